@@ -167,15 +167,14 @@ void readSensorData() {
 
 void sendSensorData() {
   readSensorData();
-  Serial.print("{\"ax\":"); Serial.print(ax_ms2, 2);
-  Serial.print(",\"ay\":"); Serial.print(ay_ms2, 2);
-  Serial.print(",\"az\":"); Serial.print(az_ms2, 2);
-  Serial.print(",\"gx\":"); Serial.print(gx_dps, 2);
-  Serial.print(",\"gy\":"); Serial.print(gy_dps, 2);
-  Serial.print(",\"gz\":"); Serial.print(gz_dps, 2);
-  Serial.print(",\"temp\":"); Serial.print(tempC, 2);
-  Serial.print(",\"distance\":"); Serial.print(distance_cm, 1);
-  Serial.println("}");
+  // CSV in fixed order: ax,ay,az,gx,gy,gz,distance
+  Serial.print(ax_ms2, 2); Serial.print(',');
+  Serial.print(ay_ms2, 2); Serial.print(',');
+  Serial.print(az_ms2, 2); Serial.print(',');
+  Serial.print(gx_dps, 2); Serial.print(',');
+  Serial.print(gy_dps, 2); Serial.print(',');
+  Serial.print(gz_dps, 2); Serial.print(',');
+  Serial.println(distance_cm, 1);
 }
 
 void loop() {
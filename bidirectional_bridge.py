@@ -1,12 +1,16 @@
 import serial
 import socket
-import json
+import orjson
 import time
 import sys
+import os
 import signal
 import threading
 import logging
-import queue
+import collections
+import selectors
+import multiprocessing
+import numpy as np
 
 # === CONFIGURATION ===
 SERIAL_PORT = '/dev/ttyACM0'
@@ -14,6 +18,25 @@ BAUD_RATE = 115200
 PC_IP = '10.100.102.16'
 SENSOR_PORT = 5055
 JOYSTICK_PORT = 5005
+MAX_COMMAND_BATCH_BYTES = 60  # Max bytes written to the Arduino in one go, below the Uno/Nano 64-byte serial RX buffer
+SENSOR_BATCH_MAX = 8  # Max sensor samples packed into one UDP datagram
+SENSOR_BATCH_WINDOW = 0.005  # Max time (s) a sample waits for others to share its datagram
+MAX_DATAGRAM_SIZE = 1400  # Stay below the MTU to avoid IP fragmentation
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024  # UDP socket buffer size, absorbs bursts while a thread is stalled
+BUSY_POLL_USEC = 50  # Busy-poll the NIC this long before sleeping on the joystick socket (Linux)
+IO_LOOP_CPU = 3  # Core the I/O loop thread is pinned to (isolate with isolcpus, see README)
+COMMAND_SENDER_CPU = 2  # Core the command sender thread is pinned to
+REALTIME_PRIORITY = 50  # SCHED_FIFO priority for both threads, above kernel housekeeping defaults
+LOG_SAMPLE_MASK = 0xFF  # Per-packet console messages are printed once every 256 packets
+SENSOR_FIELD_COUNT = 7  # Arduino CSV line: ax,ay,az,gx,gy,gz,distance
+# Wire format, same layout as struct '<7fI' on the PC: ax, ay, az, gx, gy, gz, distance, timestamp (ms)
+SENSOR_RECORD_DTYPE = np.dtype([('values', '<f4', SENSOR_FIELD_COUNT), ('timestamp', '<u4')])
+SENSOR_SAMPLES_PER_DATAGRAM = min(SENSOR_BATCH_MAX, MAX_DATAGRAM_SIZE // SENSOR_RECORD_DTYPE.itemsize)
+
+# Every command string the joystick can produce, built once and indexed by PWM speed / servo angle
+FORWARD_COMMANDS = tuple(f"forward:{speed}" for speed in range(256))
+BACKWARD_COMMANDS = tuple(f"backward:{speed}" for speed in range(256))
+SERVO_COMMANDS = tuple(f"servo:{angle}" for angle in range(181))
 
 # === LOGGING SETUP ===
 logging.basicConfig(
@@ -23,11 +46,18 @@ logging.basicConfig(
 )
 
 # === GLOBAL VARIABLES ===
-running = True
-serial_lock = threading.Lock()
-command_queue = queue.Queue()
-sensor_queue = queue.Queue()
-prev_command = None  # Global for direction switch checking
+shutdown = threading.Event()  # Set by the signal handler to stop every loop
+cmd_deque = collections.deque()  # Commands from the joystick receiver; unbounded so a queued stop is never dropped
+cmd_event = threading.Event()  # Set whenever a command is appended to cmd_deque
+tx_deque = collections.deque()  # Encoded commands waiting to be written by the I/O loop
+ack_semaphore = threading.Semaphore(0)  # Released by the I/O loop for every Arduino ack
+prev_command = None  # Last drive command produced from the joystick (joystick process)
+prev_servo = None  # Last servo angle produced from the joystick (joystick process)
+
+# Socket pair the command sender uses to wake the I/O loop when tx_deque has data
+tx_wakeup_r, tx_wakeup_w = socket.socketpair()
+tx_wakeup_r.setblocking(False)
+tx_wakeup_w.setblocking(False)
 
 
 # === INITIALIZE SERIAL CONNECTION TO ARDUINO ===
@@ -55,9 +85,33 @@ def init_serial():
 
 
 # === SOCKET SETUP ===
+def set_socket_option(sock, level, option, value, name):
+    """Apply a socket option, logging instead of failing where the OS or permissions don't allow it"""
+    try:
+        sock.setsockopt(level, option, value)
+    except OSError as e:
+        print(f"⚠ Could not set {name}: {e}")
+        logging.warning(f"Could not set {name}: {e}")
+
+
 def init_sensor_socket():
     """Setup socket for sending sensor data to PC"""
+    reconnect_delay = 2
+
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Fix the destination once so every datagram can go out with send()
+    # At boot there may be no route to the PC yet, so keep retrying until there is
+    while True:
+        try:
+            sock.connect((PC_IP, SENSOR_PORT))
+            break
+        except OSError as e:
+            print(f"⚠ Cannot reach {PC_IP}:{SENSOR_PORT} yet ({e}), retrying in {reconnect_delay} seconds...")
+            logging.warning(f"Cannot reach {PC_IP}:{SENSOR_PORT} yet: {e}")
+            if shutdown.wait(reconnect_delay):
+                sock.close()
+                sys.exit(0)
+    set_socket_option(sock, socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE, "SO_SNDBUF")
     print(f"📡 Ready to forward sensor data to {PC_IP}:{SENSOR_PORT}")
     logging.info(f"Sensor socket initialized, target: {PC_IP}:{SENSOR_PORT}")
     return sock
@@ -67,185 +121,403 @@ def init_joystick_socket():
     """Setup socket for receiving joystick commands from PC"""
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.bind(("0.0.0.0", JOYSTICK_PORT))
+    set_socket_option(sock, socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE, "SO_RCVBUF")
+    set_socket_option(sock, socket.SOL_SOCKET, getattr(socket, "SO_BUSY_POLL", 46), BUSY_POLL_USEC, "SO_BUSY_POLL")
     print(f"🎮 Listening for joystick commands on port {JOYSTICK_PORT}")
     logging.info(f"Joystick socket listening on port {JOYSTICK_PORT}")
     return sock
 
 
 # === SENSOR DATA PROCESSING ===
-def process_sensor_data(data_json):
-    """Process and validate the sensor data"""
+def decode_sensor_lines(lines):
+    """Parse a batch of CSV sensor lines into an (N, 7) float32 array, dropping lines that don't parse"""
+    # Skip anything that isn't a sample, e.g. the MPU6050 status message at startup
+    lines = [line for line in lines if line.count(b",") == SENSOR_FIELD_COUNT - 1]
+    if not lines:
+        return np.empty((0, SENSOR_FIELD_COUNT), dtype=np.float32)
+
+    try:
+        values = np.fromstring(b",".join(lines), dtype=np.float32, sep=",")
+        if values.size == len(lines) * SENSOR_FIELD_COUNT:
+            return values.reshape(-1, SENSOR_FIELD_COUNT)
+    except ValueError:
+        pass
+
+    # A corrupted line spoils the whole batch, so parse line by line and keep only the good samples
+    rows = []
+    for line in lines:
+        try:
+            row = np.fromstring(line, dtype=np.float32, sep=",")
+        except ValueError:
+            continue
+        if row.size == SENSOR_FIELD_COUNT:
+            rows.append(row)
+    if not rows:
+        return np.empty((0, SENSOR_FIELD_COUNT), dtype=np.float32)
+    return np.vstack(rows)
+
+
+def pack_sensor_data(samples):
+    """Pack decoded samples into back-to-back binary records stamped with the current time"""
+    records = np.empty(len(samples), dtype=SENSOR_RECORD_DTYPE)
+    records['values'] = samples
+    records['timestamp'] = int(time.time() * 1000) & 0xFFFFFFFF
+    return records.tobytes()
+
+
+# === JOYSTICK COMMAND PROCESSING ===
+def joystick_packet_to_commands(data):
+    """Translate a joystick packet from the PC into the Arduino commands it changes"""
+    global prev_command, prev_servo
+
+    commands = []
+
+    decoded = orjson.loads(data)
+    x = decoded.get("x", 0.0)
+    y = decoded.get("y", 0.0)
+
+    pwm_speed = min(int(abs(y) * 255), 255)  # Clamp so a bad packet can't overrun the table index
+    servo_angle = min(max(int(85 + (x * 15)), 0), 180)  # Clamp so a bad packet can't wrap the table index
+
+    if y < -0.1:
+        command = BACKWARD_COMMANDS[pwm_speed]
+    elif y > 0.1:
+        command = FORWARD_COMMANDS[pwm_speed]
+    else:
+        command = "stop"
+
+    if command != prev_command:
+        commands.append(command)
+        prev_command = command
+
+    if servo_angle != prev_servo:
+        commands.append(SERVO_COMMANDS[servo_angle])
+        prev_servo = servo_angle
+
+    return commands
+
+
+def joystick_receiver_proc(conn):
+    """Process for receiving joystick packets from PC and passing commands to the bridge"""
+    # The parent process owns shutdown and stops us with terminate()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    joystick_sock = init_joystick_socket()
+    # Wake up now and then so an orphaned receiver notices the bridge has died even with no joystick traffic
+    joystick_sock.settimeout(1.0)
+    parent_pid = os.getppid()
+
+    print("🎮 Joystick receiver process started")
+    logging.info("Joystick receiver process started")
+
+    while True:
+        try:
+            try:
+                data, addr = joystick_sock.recvfrom(1024)
+            except socket.timeout:
+                if os.getppid() != parent_pid:
+                    raise EOFError
+                continue
+            commands = joystick_packet_to_commands(data)
+            if commands:
+                conn.send(commands)
+        except (BrokenPipeError, EOFError):
+            # The bridge is gone (possibly killed without cleanup), so release the joystick port and exit
+            print("🛑 Bridge pipe closed, stopping joystick receiver process")
+            logging.warning("Bridge pipe closed, stopping joystick receiver process")
+            break
+        except Exception as e:
+            print(f"⚠ Error in joystick receiver: {e}")
+            logging.error(f"Error in joystick receiver: {e}")
+
+    joystick_sock.close()
+
+
+def queue_serial_write(payload):
+    """Hand bytes to the I/O loop for writing to the Arduino"""
+    tx_deque.append(payload)
     try:
-        data = json.loads(data_json)
+        tx_wakeup_w.send(b"\0")
+    except BlockingIOError:
+        pass  # The I/O loop already has wakeups pending
 
-        required_fields = ['ax', 'ay', 'az', 'gx', 'gy', 'gz', 'distance']
-        for field in required_fields:
-            if field not in data:
-                return None
 
-        data['timestamp'] = time.time()
-        return data
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"⚠ Error processing sensor data: {e}")
-        logging.error(f"Error processing sensor data: {e}")
-        return None
+# === REALTIME SCHEDULING ===
+def set_realtime(cpu, name):
+    """Pin the calling thread to one core and run it under SCHED_FIFO, logging instead of failing where not allowed"""
+    # On Linux a pid of 0 refers to the calling thread, not the whole process
+    if hasattr(os, "sched_setaffinity") and cpu < (os.cpu_count() or 1):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError as e:
+            print(f"⚠ Could not pin {name} to CPU {cpu}: {e}")
+            logging.warning(f"Could not pin {name} to CPU {cpu}: {e}")
+
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(REALTIME_PRIORITY))
+        except OSError as e:
+            print(f"⚠ Could not set realtime priority for {name}: {e}")
+            logging.warning(f"Could not set realtime priority for {name}: {e}")
 
 
 # === THREAD FUNCTIONS ===
-def sensor_reader_thread(ser, sensor_sock):
-    """Thread for reading sensor data from Arduino and sending to PC"""
+def io_loop_thread(ser, sensor_sock, joystick_conn):
+    """Event loop that owns the serial port, the sensor socket and the joystick pipe, woken by the selector"""
+    set_realtime(IO_LOOP_CPU, "I/O loop")
+
     packet_count = 0
     error_count = 0
     max_errors = 20
-    last_report_time = time.time()
+    sensor_forwarding = True
+    last_report_time = time.monotonic()
+    serial_buffer = b""  # Bytes read from the Arduino that don't form a full line yet
+
+    # Packed samples waiting to be sent to the PC back to back in one datagram
+    pending = bytearray()
+    pending_count = 0
+    last_flush_time = time.monotonic()
 
-    print("🔄 Sensor reader thread started")
-    logging.info("Sensor reader thread started")
+    def send_datagram(payload):
+        try:
+            sensor_sock.send(payload)
+        except ConnectionRefusedError:
+            # ICMP port unreachable from an earlier datagram: the PC app isn't listening, so just drop it
+            pass
+
+    def flush_pending():
+        nonlocal pending_count, last_flush_time
+        if pending:
+            send_datagram(pending)
+            pending.clear()
+        pending_count = 0
+        last_flush_time = time.monotonic()
+
+    def handle_sensor_lines(lines):
+        nonlocal packet_count, error_count, last_report_time, pending_count
+        samples = decode_sensor_lines(lines)
+
+        invalid = len(lines) - len(samples)
+        if not len(samples):
+            error_count += invalid
+            return
+        error_count = invalid
+        packet_count += len(samples)
 
-    while running:
         try:
-            with serial_lock:
-                if ser.in_waiting > 0:
-                    line = ser.readline().decode().strip()
-                    if line and not line.startswith("ack"):
-                        sensor_queue.put(line)
+            # Queue for the next datagrams to the PC, sending each one as soon as it is full
+            pending.extend(pack_sensor_data(samples))
+            pending_count += len(samples)
+            record_size = SENSOR_RECORD_DTYPE.itemsize
+            while pending_count >= SENSOR_SAMPLES_PER_DATAGRAM:
+                chunk = SENSOR_SAMPLES_PER_DATAGRAM * record_size
+                send_datagram(pending[:chunk])
+                del pending[:chunk]
+                pending_count -= SENSOR_SAMPLES_PER_DATAGRAM
+        except Exception as e:
+            print(f"❌ Sensor send error: {e}")
+            logging.error(f"Sensor send error: {e}")
+
+        current_time = time.monotonic()
+        if current_time - last_report_time >= 5:
+            latest = samples[-1]
+            print(f"📊 Status: Sent {packet_count} sensor packets, "
+                  f"last distance: {latest[6]:.1f} cm")
+            logging.info(f"Sent {packet_count} sensor packets")
+
+            if packet_count % 10 == 0:
+                print(f"🔍 Latest data: {latest.tolist()}")
+
+            last_report_time = current_time
+
+    def stop_serial_reading(reason):
+        # A dead tty stays readable forever, so stop watching it and shut the bridge down
+        print(f"❌ {reason}. Stopping the bridge.")
+        logging.critical(f"{reason}. Stopping the bridge.")
+        sel.unregister(serial_fd)
+        shutdown.set()
+
+    def on_serial_readable():
+        nonlocal serial_buffer, error_count
+        try:
+            serial_buffer += ser.read(ser.in_waiting or 1)
+        except serial.SerialException as e:
+            stop_serial_reading(f"Serial port lost: {e}")
+            return
         except Exception as e:
             error_count += 1
             print(f"❌ Serial read error: {e}")
             logging.error(f"Serial read error: {e}")
+            if error_count > max_errors:
+                stop_serial_reading(f"Too many serial read errors ({error_count})")
+            return
+
+        # Acks are handled right away; sensor lines are decoded together as one batch
+        *lines, serial_buffer = serial_buffer.split(b"\n")
+        sensor_lines = []
+        for line in lines:
+            line = line.strip()
+            if line.startswith(b"ack"):
+                ack_semaphore.release()
+            elif line:
+                sensor_lines.append(line)
+
+        if sensor_lines and sensor_forwarding:
+            handle_sensor_lines(sensor_lines)
+
+    def on_joystick_readable():
+        try:
+            cmd_deque.extend(joystick_conn.recv())
+            cmd_event.set()
+        except EOFError:
+            print("❌ Joystick receiver process exited")
+            logging.critical("Joystick receiver process exited")
+            sel.unregister(joystick_conn)
+        except Exception as e:
+            print(f"⚠ Error reading joystick commands: {e}")
+            logging.error(f"Error reading joystick commands: {e}")
+
+    def on_tx_wakeup():
+        try:
+            tx_wakeup_r.recv(4096)
+        except BlockingIOError:
+            pass
 
-        while not sensor_queue.empty():
+        # Write all pending commands in one go
+        if tx_deque:
+            batch = []
+            while tx_deque:
+                batch.append(tx_deque.popleft())
             try:
-                line = sensor_queue.get_nowait()
-                data = process_sensor_data(line)
-                if data:
-                    error_count = 0
-                    packet_count += 1
-
-                    # Send to PC
-                    sensor_sock.sendto(json.dumps(data).encode(), (PC_IP, SENSOR_PORT))
-
-                    current_time = time.time()
-                    if current_time - last_report_time >= 5:
-                        print(f"📊 Status: Sent {packet_count} sensor packets, "
-                              f"last distance: {data.get('distance', 'N/A')} cm")
-                        logging.info(f"Sent {packet_count} sensor packets")
-
-                        if packet_count % 10 == 0:
-                            print(f"🔍 Latest data: {json.dumps(data)}")
-
-                        last_report_time = current_time
-                else:
-                    error_count += 1
+                ser.write(b"".join(batch))
             except Exception as e:
-                error_count += 1
-                print(f"❌ Sensor processing error: {e}")
-                logging.error(f"Sensor processing error: {e}")
+                print(f"❌ Serial write error: {e}")
+                logging.error(f"Serial write error: {e}")
 
-        if error_count > max_errors:
-            print(f"❌ Too many sensor errors ({error_count}). Exiting thread.")
-            logging.critical(f"Too many sensor errors ({error_count}). Exiting thread.")
-            break
+    serial_fd = ser.fileno()
+    sel = selectors.DefaultSelector()
+    sel.register(serial_fd, selectors.EVENT_READ, on_serial_readable)
+    sel.register(joystick_conn, selectors.EVENT_READ, on_joystick_readable)
+    sel.register(tx_wakeup_r, selectors.EVENT_READ, on_tx_wakeup)
 
-        time.sleep(0.01)
+    print("🔄 I/O loop started")
+    logging.info("I/O loop started")
 
+    while not shutdown.is_set():
+        now = time.monotonic()
 
-def joystick_receiver_thread(joystick_sock, ser):
-    """Thread for receiving joystick commands from PC and sending to Arduino"""
-    print("🎮 Joystick receiver thread started")
-    logging.info("Joystick receiver thread started")
+        if pending and now - last_flush_time >= SENSOR_BATCH_WINDOW:
+            try:
+                flush_pending()
+            except Exception as e:
+                print(f"❌ Sensor send error: {e}")
+                logging.error(f"Sensor send error: {e}")
+                pending.clear()
+                pending_count = 0
 
-    prev_servo = None
+        # Block until one of the file descriptors is ready, or the sensor batch window runs out
+        if pending:
+            timeout = max(0.0, SENSOR_BATCH_WINDOW - (now - last_flush_time))
+        else:
+            timeout = 0.1
 
-    while running:
-        try:
-            data, addr = joystick_sock.recvfrom(1024)
-            decoded = json.loads(data.decode())
-            x = decoded.get("x", 0.0)
-            y = decoded.get("y", 0.0)
-
-            pwm_speed = int(abs(y) * 255)
-            servo_angle = int(85 + (x * 15))
-
-            if y < -0.1:
-                command = f"backward:{pwm_speed}"
-            elif y > 0.1:
-                command = f"forward:{pwm_speed}"
-            else:
-                command = "stop"
+        for key, _ in sel.select(timeout):
+            key.data()
 
-            # Queue the commands for sending to Arduino
-            global prev_command
-            if command != prev_command:
-                command_queue.put(command)
-                prev_command = command
+        if sensor_forwarding and error_count > max_errors and not shutdown.is_set():
+            print(f"❌ Too many sensor errors ({error_count}). Stopping sensor forwarding.")
+            logging.critical(f"Too many sensor errors ({error_count}). Stopping sensor forwarding.")
+            sensor_forwarding = False
 
-            if servo_angle != prev_servo:
-                command_queue.put(f"servo:{servo_angle}")
-                prev_servo = servo_angle
+    sel.close()
 
-        except socket.timeout:
-            pass
-        except Exception as e:
-            print(f"⚠ Error in joystick receiver: {e}")
-            logging.error(f"Error in joystick receiver: {e}")
 
-        time.sleep(0.01)
+def is_direction_switch(command, last_drive):
+    """Check whether a drive command reverses the direction of the previous one"""
+    return (command.startswith("forward") and last_drive and last_drive.startswith("backward")) or \
+        (command.startswith("backward") and last_drive and last_drive.startswith("forward"))
 
 
-def command_sender_thread(ser):
-    """Thread for sending commands from queue to Arduino"""
+def command_sender_thread():
+    """Thread for sending queued commands to Arduino"""
+    set_realtime(COMMAND_SENDER_CPU, "command sender")
+
     print("🎯 Command sender thread started")
     logging.info("Command sender thread started")
 
     def wait_for_ack(timeout=0.1):
-        start = time.time()
-        while time.time() - start < timeout:
-            with serial_lock:
-                if ser.in_waiting:
-                    line = ser.readline().decode().strip()
-                    if line == "ack":
-                        return True
-        return False
-
-    while running:
-        try:
-            try:
-                command = command_queue.get(timeout=0.5)
-            except queue.Empty:
-                continue
+        return ack_semaphore.acquire(timeout=timeout)
+
+    batch_count = 0
+    last_drive = None  # Last forward/backward/stop command sent to the Arduino
+    held_command = None  # Direction switch held back so it starts its own batch
 
-            global prev_command
-            if (command.startswith("forward") and prev_command and prev_command.startswith("backward")) or \
-                    (command.startswith("backward") and prev_command and prev_command.startswith("forward")):
-                with serial_lock:
-                    ser.write(b"stop\n")
+    while not shutdown.is_set():
+        try:
+            if held_command is not None:
+                command, held_command = held_command, None
+            else:
+                if not cmd_deque:
+                    cmd_event.wait(0.5)
+                    cmd_event.clear()
+                    if not cmd_deque:
+                        continue
+                command = cmd_deque.popleft()
+
+            if is_direction_switch(command, last_drive):
+                queue_serial_write(b"stop\n")
                 print("🛑 Sent stop for direction switch")
                 logging.info("Sent stop for direction switch")
-                time.sleep(0.1)
-
-            # Send the command
-            with serial_lock:
-                ser.write(f"{command}\n".encode())
-            print(f"🧭 Sent to Arduino: {command}")
-            logging.info(f"Sent to Arduino: {command}")
-
-            if wait_for_ack():
-                print("✅ Ack received")
+                shutdown.wait(0.1)
+
+            # Collect whatever else is already queued, up to a direction switch
+            batch = [command]
+            batch_bytes = len(command) + 1
+            if not command.startswith("servo"):
+                last_drive = command
+            while cmd_deque and batch_bytes + len(cmd_deque[0]) + 1 <= MAX_COMMAND_BATCH_BYTES:
+                command = cmd_deque.popleft()
+                if is_direction_switch(command, last_drive):
+                    held_command = command
+                    break
+                batch.append(command)
+                batch_bytes += len(command) + 1
+                if not command.startswith("servo"):
+                    last_drive = command
+
+            # Drop stale acks (e.g. for the direction-switch stop)
+            while ack_semaphore.acquire(blocking=False):
+                pass
+
+            # Hand the whole batch to the I/O loop as a single write
+            queue_serial_write(("\n".join(batch) + "\n").encode())
+            batch_count += 1
+            if not (batch_count & LOG_SAMPLE_MASK):
+                print(f"🧭 Sent to Arduino: {', '.join(batch)} ({batch_count} batches)")
+            logging.debug("Sent to Arduino: %s", batch)
+
+            acked = 0
+            for _ in batch:
+                if not wait_for_ack():
+                    break
+                acked += 1
+
+            if acked == len(batch):
+                if not (batch_count & LOG_SAMPLE_MASK):
+                    print("✅ Ack received")
                 logging.debug("Ack received")
             else:
-                print("⚠ No ack for command")
-                logging.warning("No ack received for command")
+                print(f"⚠ No ack for {len(batch) - acked} of {len(batch)} commands")
+                logging.warning(f"No ack received for {len(batch) - acked} of {len(batch)} commands")
 
         except Exception as e:
             print(f"⚠ Error in command sender: {e}")
             logging.error(f"Error in command sender: {e}")
 
-        time.sleep(0.01)
-
 
 # === CLEANUP FUNCTION ===
-def cleanup(ser, sensor_sock, joystick_sock):
+def cleanup(ser, sensor_sock, joystick_proc):
     """Clean up resources before exiting"""
     print("\n🛑 Shutting down...")
     logging.info("Shutting down")
@@ -262,10 +534,12 @@ def cleanup(ser, sensor_sock, joystick_sock):
         print("✅ Sensor socket closed")
         logging.info("Sensor socket closed")
 
-    if joystick_sock:
-        joystick_sock.close()
-        print("✅ Joystick socket closed")
-        logging.info("Joystick socket closed")
+    # Stop the joystick receiver process (it owns the joystick socket)
+    if joystick_proc and joystick_proc.is_alive():
+        joystick_proc.terminate()
+        joystick_proc.join(timeout=2.0)
+        print("✅ Joystick receiver process stopped")
+        logging.info("Joystick receiver process stopped")
 
     print("✅ Cleanup complete")
     logging.info("Cleanup complete")
@@ -274,8 +548,7 @@ def cleanup(ser, sensor_sock, joystick_sock):
 # === SIGNAL HANDLER ===
 def signal_handler(sig, frame):
     """Handle keyboard interrupts"""
-    global running
-    running = False
+    shutdown.set()
     print("\n🛑 Program termination requested")
     logging.info("Program termination requested")
 
@@ -288,8 +561,6 @@ signal.signal(signal.SIGTERM, signal_handler)
 # === MAIN FUNCTION ===
 def main():
     """Main function"""
-    global running
-
     print("🤖 Bidirectional Robot Control Bridge")
     print("------------------------------------")
     logging.info("Bidirectional Robot Control Bridge started")
@@ -297,20 +568,23 @@ def main():
     # Initialize connections
     ser = init_serial()
     sensor_sock = init_sensor_socket()
-    joystick_sock = init_joystick_socket()
+
+    # Joystick packets are decoded in their own process so they don't share the GIL
+    # with sensor encoding; commands come back over a pipe the I/O loop can select on
+    joystick_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    joystick_proc = multiprocessing.Process(target=joystick_receiver_proc, args=(child_conn,))
+    joystick_proc.daemon = True
+    joystick_proc.start()
+    child_conn.close()
 
     # Create and start threads
     threads = []
 
-    sensor_thread = threading.Thread(target=sensor_reader_thread, args=(ser, sensor_sock))
-    sensor_thread.daemon = True
-    threads.append(sensor_thread)
-
-    joystick_thread = threading.Thread(target=joystick_receiver_thread, args=(joystick_sock, ser))
-    joystick_thread.daemon = True
-    threads.append(joystick_thread)
+    io_thread = threading.Thread(target=io_loop_thread, args=(ser, sensor_sock, joystick_conn))
+    io_thread.daemon = True
+    threads.append(io_thread)
 
-    command_thread = threading.Thread(target=command_sender_thread, args=(ser,))
+    command_thread = threading.Thread(target=command_sender_thread)
     command_thread.daemon = True
     threads.append(command_thread)
 
@@ -318,12 +592,11 @@ def main():
     for thread in threads:
         thread.start()
 
-    # Main loop - just keep program alive and check for exit condition
+    # Block until the signal handler (or Ctrl+C) requests shutdown
     try:
-        while running:
-            time.sleep(0.1)
+        shutdown.wait()
     except KeyboardInterrupt:
-        running = False
+        shutdown.set()
         print("\n🛑 Keyboard interrupt received")
         logging.info("Keyboard interrupt received")
 
@@ -333,10 +606,10 @@ def main():
         thread.join(timeout=2.0)
 
     # Clean up when loop exits
-    cleanup(ser, sensor_sock, joystick_sock)
+    cleanup(ser, sensor_sock, joystick_proc)
 
     return 0
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     sys.exit(main())
@@ -2,15 +2,23 @@
  * Minimal Force Feedback Program for Robot Control
  * Applies specific force feedback pattern based on input parameter
  *
+ * Usage:
+ *   enhanced_force_feedback_minimal.exe <type>     Play one feedback pattern and exit
+ *   enhanced_force_feedback_minimal.exe --daemon   Serve feedback requests on \\.\pipe\ff_trigger:
+ *                                                  each request is one byte (the feedback type),
+ *                                                  answered with one byte once the pattern is done
+ *
  * Compile with MinGW:
- * gcc -o enhanced_force_feedback_minimal.exe enhanced_force_feedback_minimal.c -I"C:\Program Files (x86)\Microsoft DirectX SDK (June 2010)\Include" -L"C:\Program Files (x86)\Microsoft DirectX SDK (June 2010)\Lib\x64" -ldinput8 -ldxguid -lole32 -DDIRECTINPUT_VERSION=0x0800
+ * gcc -o enhanced_force_feedback_minimal.exe enhanced_force_feedback_minimal.c -I"C:\Program Files (x86)\Microsoft DirectX SDK (June 2010)\Include" -L"C:\Program Files (x86)\Microsoft DirectX SDK (June 2010)\Lib\x64" -ldinput8 -ldxguid -lole32 -ladvapi32 -DDIRECTINPUT_VERSION=0x0800
  */
 
 #define DIRECTINPUT_VERSION 0x0800
 #define WIN32_LEAN_AND_MEAN
 
 #include <windows.h>
+#include <sddl.h>
 #include <stdio.h>
+#include <string.h>
 #include <stdbool.h>
 #include <dinput.h>
 
@@ -23,6 +31,10 @@
 #define FORCE_STRENGTH 1          // Base force feedback strength (0-1 range)
 #define OSCILLATION_DURATION 300    // Duration of feedback in ms
 
+// Daemon mode
+#define PIPE_NAME "\\\\.\\pipe\\ff_trigger"
+// Administrators get full access; the (non-elevated) interactive user may read and write
+#define PIPE_SDDL "D:(A;;GA;;;BA)(A;;GRGW;;;IU)"
 
 // Global variables
 LPDIRECTINPUT8 g_pDI = NULL;
@@ -35,20 +47,28 @@ BOOL CALLBACK EnumDevicesCallback(const DIDEVICEINSTANCE* pdidInstance, VOID* pC
 bool InitializeDirectInput(void);
 void CleanupAll(void);
 void ApplyGentleOscillation(int feedbackType);
+int RunDaemon(void);
 
 int main(int argc, char* argv[]) {
     HRESULT hr;
     int feedbackType = FEEDBACK_NONE;  // Default to obstacle
+    bool daemonMode = false;
 
     // Parse command line arguments
-    if (argc > 1) {
+    if (argc > 1 && strcmp(argv[1], "--daemon") == 0) {
+        daemonMode = true;
+    } else if (argc > 1) {
         feedbackType = atoi(argv[1]);
         if (feedbackType < FEEDBACK_NONE || feedbackType > FEEDBACK_MOVEMENT) {
             feedbackType = FEEDBACK_NONE;  // Default if invalid
         }
     }
 
-    printf("Minimal Force Feedback - Type: %d\n", feedbackType);
+    if (daemonMode) {
+        printf("Minimal Force Feedback - Daemon mode\n");
+    } else {
+        printf("Minimal Force Feedback - Type: %d\n", feedbackType);
+    }
 
     // Initialize COM
     hr = CoInitialize(NULL);
@@ -65,7 +85,9 @@ int main(int argc, char* argv[]) {
     }
 
     // Apply the feedback
-    if (feedbackType != FEEDBACK_NONE) {
+    if (daemonMode) {
+        RunDaemon();
+    } else if (feedbackType != FEEDBACK_NONE) {
         ApplyGentleOscillation(feedbackType);
     } else {
         printf("No feedback requested\n");
@@ -77,6 +99,61 @@ int main(int argc, char* argv[]) {
     return 0;
 }
 
+// Serve feedback requests from a single client until it disconnects
+int RunDaemon(void) {
+    SECURITY_ATTRIBUTES sa;
+    HANDLE hPipe;
+    BYTE request;
+    BYTE done;
+    DWORD bytesRead;
+    DWORD bytesWritten;
+    int feedbackType;
+
+    ZeroMemory(&sa, sizeof(sa));
+    sa.nLength = sizeof(sa);
+    sa.bInheritHandle = FALSE;
+    if (!ConvertStringSecurityDescriptorToSecurityDescriptorA(PIPE_SDDL, SDDL_REVISION_1,
+                                                              &sa.lpSecurityDescriptor, NULL)) {
+        printf("Failed to build pipe security descriptor. Error: %lu\n", GetLastError());
+        return 1;
+    }
+
+    hPipe = CreateNamedPipeA(PIPE_NAME, PIPE_ACCESS_DUPLEX,
+                             PIPE_TYPE_BYTE | PIPE_READMODE_BYTE | PIPE_WAIT | PIPE_REJECT_REMOTE_CLIENTS,
+                             1, 16, 16, 0, &sa);
+    LocalFree(sa.lpSecurityDescriptor);
+    if (hPipe == INVALID_HANDLE_VALUE) {
+        printf("Failed to create pipe %s. Error: %lu\n", PIPE_NAME, GetLastError());
+        return 1;
+    }
+
+    printf("Waiting for client on %s...\n", PIPE_NAME);
+    if (!ConnectNamedPipe(hPipe, NULL) && GetLastError() != ERROR_PIPE_CONNECTED) {
+        printf("Failed to connect pipe. Error: %lu\n", GetLastError());
+        CloseHandle(hPipe);
+        return 1;
+    }
+    printf("Client connected\n");
+
+    // One byte in (feedback type), one byte out (done) per request
+    while (g_bRunning && ReadFile(hPipe, &request, 1, &bytesRead, NULL) && bytesRead == 1) {
+        feedbackType = request;
+        if (feedbackType > FEEDBACK_NONE && feedbackType <= FEEDBACK_MOVEMENT) {
+            ApplyGentleOscillation(feedbackType);
+        }
+
+        done = request;
+        if (!WriteFile(hPipe, &done, 1, &bytesWritten, NULL)) {
+            break;
+        }
+    }
+
+    printf("Client disconnected\n");
+    DisconnectNamedPipe(hPipe);
+    CloseHandle(hPipe);
+    return 0;
+}
+
 bool InitializeDirectInput(void) {
     HRESULT hr;
 
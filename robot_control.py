@@ -2,13 +2,13 @@
 """
 Bidirectional Robot Control System
 - Reads joystick inputs and sends to Raspberry Pi
-- Receives sensor data and triggers force feedback via C executable
+- Receives sensor data and triggers force feedback via an elevated C helper daemon
 - Blocks joystick control during force feedback
 """
 import socket
 import pygame
 import threading
-import json
+import orjson
 import time
 import subprocess
 import sys
@@ -16,6 +16,9 @@ import os
 import logging
 import queue
 import signal
+import ctypes
+import selectors
+import struct
 
 # === CONFIGURATION ===
 RPI_IP = "10.100.102.168"  # RPi's IP address
@@ -24,7 +27,18 @@ SENSOR_PORT = 5055  # Port for receiving sensor data
 FORCE_FEEDBACK_EXE = "enhanced_force_feedback_minimal.exe"  # Force feedback executable
 DEADZONE = 0.15  # Joystick deadzone threshold
 UPDATE_INTERVAL = 0.01  # Send joystick updates every 10ms
-OSCILLATION_DURATION = 1000  # Duration of force feedback in ms (matches C code)
+LOOP_TIMEOUT = 0.005  # Max time the control loop waits on the sensor socket before polling the joystick
+GYRO_AXIS_THRESHOLD = 40.0  # degrees/sec
+DISTANCE_THRESHOLD = 20.0   # cm
+MIN_TRIGGER_INTERVAL = 3.0  # seconds between force feedback triggers
+FEEDBACK_PIPE = r"\\.\pipe\ff_trigger"  # Named pipe served by the force feedback daemon
+FEEDBACK_PIPE_CONNECT_TIMEOUT = 30.0  # Seconds to wait for the daemon (includes the UAC prompt)
+FEEDBACK_TIMEOUT = 0.3 + 1.0  # Oscillation duration plus a margin; controls come back after this even without a reply
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024  # UDP socket buffer size, absorbs bursts while a thread is stalled
+BUSY_POLL_USEC = 50  # Busy-poll the NIC this long before sleeping on the sensor socket (Linux only)
+JOYSTICK_TOS = 0xB8  # DSCP Expedited Forwarding for joystick commands
+LOG_SAMPLE_MASK = 0xFF  # Per-packet console messages are printed once every 256 packets
+SENSOR_STRUCT = struct.Struct('<7fI')  # Wire format: ax, ay, az, gx, gy, gz, distance, timestamp (ms)
 
 # === LOGGING SETUP ===
 logging.basicConfig(
@@ -34,16 +48,19 @@ logging.basicConfig(
 )
 
 # === GLOBAL VARIABLES ===
-running = True
+shutdown = threading.Event()  # Set by the signal handler to stop every loop
 feedback_process = None
+feedback_pipe = None  # Connection to the elevated force feedback daemon (Windows)
+feedback_requests = queue.Queue()  # Feedback types waiting to be sent to the daemon
 feedback_active = False
-sensor_data_queue = queue.Queue()
+feedback_deadline = 0  # time.monotonic() after which feedback_active is cleared even if the daemon never replies
+feedback_pipe_busy = False  # Set while feedback_pipe_thread is waiting on the daemon
 last_notify_time = 0  # For rate-limiting notifications
 
 
 def apply_deadzone(value, threshold=DEADZONE):
     """Apply deadzone to joystick values"""
-    return value if abs(value) > threshold else 0.0
+    return value if value > threshold or value < -threshold else 0.0
 
 
 def init_joystick():
@@ -68,10 +85,23 @@ def init_joystick():
         return None
 
 
+def set_socket_option(sock, level, option, value, name):
+    """Apply a socket option, logging instead of failing where the OS or permissions don't allow it"""
+    try:
+        sock.setsockopt(level, option, value)
+    except OSError as e:
+        print(f"⚠ Could not set {name}: {e}")
+        logging.warning(f"Could not set {name}: {e}")
+
+
 def init_joystick_socket():
     """Initialize UDP socket for sending joystick data"""
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Fix the destination once so every datagram can go out with send()
+        sock.connect((RPI_IP, JOYSTICK_PORT))
+        set_socket_option(sock, socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE, "SO_SNDBUF")
+        set_socket_option(sock, socket.IPPROTO_IP, socket.IP_TOS, JOYSTICK_TOS, "IP_TOS")
         print(f"📡 Joystick socket initialized, target: {RPI_IP}:{JOYSTICK_PORT}")
         logging.info(f"Joystick socket initialized, target: {RPI_IP}:{JOYSTICK_PORT}")
         return sock
@@ -86,6 +116,12 @@ def init_sensor_socket():
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.bind(("0.0.0.0", SENSOR_PORT))
+        set_socket_option(sock, socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE, "SO_RCVBUF")
+        if sys.platform.startswith("linux"):
+            set_socket_option(sock, socket.SOL_SOCKET, getattr(socket, "SO_BUSY_POLL", 46), BUSY_POLL_USEC,
+                              "SO_BUSY_POLL")
+        # The control loop waits on the selector, so reads must never block
+        sock.setblocking(False)
         print(f"📡 Listening for sensor data on port {SENSOR_PORT}")
         logging.info(f"Sensor socket listening on port {SENSOR_PORT}")
         return sock
@@ -95,223 +131,253 @@ def init_sensor_socket():
         return None
 
 
-def joystick_sender_thread(joystick, joystick_sock):
-    """Thread for reading joystick input and sending to RPi"""
-    print("🎮 Joystick sender thread started")
-    logging.info("Joystick sender thread started")
-
-    last_x, last_y = 0.0, 0.0
-    last_send_time = 0
+def control_loop(joystick, joystick_sock, sensor_sock):
+    """Single loop that sends joystick input to the RPi and handles sensor data from it"""
     global last_notify_time
 
-    while running:
-        try:
-            # Process events to get fresh joystick data
-            pygame.event.pump()
-
-            # Read joystick axes
-            x_raw = joystick.get_axis(0)
-            y_raw = joystick.get_axis(1)
-            x = apply_deadzone(round(x_raw, 3))
-            y = apply_deadzone(round(y_raw, 3))
-
-            # Read buttons
-            buttons = [joystick.get_button(i) for i in range(joystick.get_numbuttons())]
+    x, y = 0.0, 0.0
+    last_send_time = 0
+    send_count = 0
 
-            # Only send if force feedback is not active
-            current_time = time.time()
-            if not feedback_active:
-                # Only send if values changed or enough time passed
-                if (x != last_x or y != last_y) and current_time - last_send_time > UPDATE_INTERVAL:
-                    data = {"x": x, "y": y, "buttons": buttons}
-                    joystick_sock.sendto(json.dumps(data).encode(), (RPI_IP, JOYSTICK_PORT))
-                    print(f"📤 Sent joystick: x={x:.2f}, y={y:.2f}")
+    # Built once and updated in place for every packet
+    buttons = [0] * joystick.get_numbuttons()
+    last_key = (0, 85, tuple(buttons))  # Centered stick, nothing pressed
+    data = {"x": 0.0, "y": 0.0, "buttons": buttons}
 
-                    last_x, last_y = x, y
-                    last_send_time = current_time
-            elif (x != last_x or y != last_y) and current_time - last_notify_time > 1.0:
-                # Provide notification about blocked controls, but only once per second
-                print("⚠️ Joystick input ignored during force feedback")
-                last_notify_time = current_time
-                # We still update last_x and last_y to avoid repeated notifications for the same movement
-                last_x, last_y = x, y
+    packet_count = 0
+    last_report_time = time.monotonic()
+    latest_sensor_data = None  # Store the latest data for regular printing
+    last_trigger_time = 0
 
-        except Exception as e:
-            print(f"⚠ Error in joystick sender: {e}")
-            logging.error(f"Error in joystick sender: {e}")
+    def check_feedback(sensor_data, current_time):
+        nonlocal last_trigger_time
 
-        # Small delay to prevent CPU hogging
-        time.sleep(0.01)
+        # Nothing can fire during the cooldown, so skip the threshold checks entirely
+        if current_time - last_trigger_time <= MIN_TRIGGER_INTERVAL:
+            return
 
+        ax, ay, az, gx, gy, gz, distance, timestamp = sensor_data
 
-def sensor_receiver_thread(sensor_sock):
-    """Thread for receiving sensor data from RPi"""
-    print("📡 Sensor receiver thread started")
-    logging.info("Sensor receiver thread started")
+        obstacle_trigger = distance < DISTANCE_THRESHOLD
+        movement_trigger = not (-GYRO_AXIS_THRESHOLD <= gx <= GYRO_AXIS_THRESHOLD and
+                                -GYRO_AXIS_THRESHOLD <= gy <= GYRO_AXIS_THRESHOLD)
 
-    packet_count = 0
-    last_report_time = time.time()
-    latest_sensor_data = None  # Store the latest data for regular printing
+        if obstacle_trigger or movement_trigger:
+            if obstacle_trigger:
+                feedback_type = 1  # FEEDBACK_OBSTACLE
+                print(f"\n⚠️ OBSTACLE DETECTED! Distance: {distance:.1f} cm")
+            else:
+                feedback_type = 2  # FEEDBACK_MOVEMENT
+                print(f"\n⚠️ MOVEMENT DETECTED! gx={gx:.1f}, gy={gy:.1f}")
 
-    while running:
-        try:
-            # Set a timeout so we can check the running flag
-            sensor_sock.settimeout(0.5)
+            trigger_force_feedback(feedback_type)
+            last_trigger_time = current_time
 
-            # Receive data
-            data, addr = sensor_sock.recvfrom(1024)
+    def on_sensor_readable():
+        nonlocal packet_count, latest_sensor_data
+        current_time = time.monotonic()
 
+        # Drain every datagram already queued (each carries one or more fixed-size binary samples)
+        while True:
             try:
-                sensor_data = json.loads(data.decode())
+                data = sensor_sock.recv(2048)
+            except BlockingIOError:
+                break
+            except Exception as e:
+                print(f"⚠ Error in sensor receiver: {e}")
+                logging.error(f"Error in sensor receiver: {e}")
+                break
+
+            if len(data) % SENSOR_STRUCT.size:
+                print(f"⚠ Received malformed sensor packet ({len(data)} bytes)")
+                logging.warning(f"Received malformed sensor packet ({len(data)} bytes)")
+                continue
+
+            for sensor_data in SENSOR_STRUCT.iter_unpack(data):
                 packet_count += 1
 
                 # Store the latest data
                 latest_sensor_data = sensor_data
 
-                # Queue the data for processing
-                sensor_data_queue.put(sensor_data)
-
-                # Print status and latest data every 5 seconds
-                current_time = time.time()
-                if current_time - last_report_time >= 5:
-                    print(f"📊 Status: Received {packet_count} sensor packets")
-                    logging.info(f"Received {packet_count} sensor packets")
-
-                    # Print the latest sensor data in a formatted way
-                    if latest_sensor_data:
-                        print("\n🔍 Latest Sensor Data:")
-                        print(f"  Gyroscope (deg/s): X={latest_sensor_data.get('gx', 0.0):.2f}, "
-                              f"Y={latest_sensor_data.get('gy', 0.0):.2f}, "
-                              f"Z={latest_sensor_data.get('gz', 0.0):.2f}")
-                        print(f"  Accelerometer (m/s²): X={latest_sensor_data.get('ax', 0.0):.2f}, "
-                              f"Y={latest_sensor_data.get('ay', 0.0):.2f}, "
-                              f"Z={latest_sensor_data.get('az', 0.0):.2f}")
-                        print(f"  Distance: {latest_sensor_data.get('distance', 'N/A')} cm")
-                        print(f"  Temperature: {latest_sensor_data.get('temp', 'N/A')} °C\n")
-
-                    last_report_time = current_time
-
-            except json.JSONDecodeError:
-                print("⚠ Received invalid JSON")
-                logging.warning("Received invalid JSON")
-
-        except socket.timeout:
-            # This is normal with the timeout, just continue
-            pass
-        except Exception as e:
-            print(f"⚠ Error in sensor receiver: {e}")
-            logging.error(f"Error in sensor receiver: {e}")
+                try:
+                    check_feedback(sensor_data, current_time)
+                except Exception as e:
+                    print(f"⚠ Error in feedback controller: {e}")
+                    logging.error(f"Error in feedback controller: {e}")
+
+    sel = selectors.DefaultSelector()
+    sel.register(sensor_sock, selectors.EVENT_READ, on_sensor_readable)
+
+    print("🔄 Control loop started")
+    logging.info("Control loop started")
+
+    while not shutdown.is_set():
+        try:
+            # Wait briefly for sensor data; SDL has no portable fd, so the joystick is polled in between
+            for key, _ in sel.select(LOOP_TIMEOUT):
+                key.data()
+
+            for event in pygame.event.get():
+                if event.type == pygame.JOYAXISMOTION:
+                    if event.axis == 0:
+                        x = apply_deadzone(round(event.value, 3))
+                    elif event.axis == 1:
+                        y = apply_deadzone(round(event.value, 3))
+                elif event.type == pygame.JOYBUTTONDOWN or event.type == pygame.JOYBUTTONUP:
+                    if event.button < len(buttons):
+                        buttons[event.button] = int(event.type == pygame.JOYBUTTONDOWN)
+
+            # Quantize to the PWM/servo values the Arduino actually uses so sub-step jitter is not resent
+            key = (int(abs(y) * 255) * (-1 if y < 0 else 1), int(85 + x * 15), tuple(buttons))
+
+            # Only send if force feedback is not active
+            current_time = time.monotonic()
+            if feedback_active and current_time >= feedback_deadline:
+                # The daemon never reported completion (hung or suspended), so don't leave the controls locked
+                print("⚠️ Force feedback daemon did not respond in time")
+                logging.warning("Force feedback daemon did not respond in time")
+                end_feedback_mode()
+            if not feedback_active:
+                # Only send if values changed or enough time passed
+                if key != last_key and current_time - last_send_time > UPDATE_INTERVAL:
+                    data["x"] = x
+                    data["y"] = y
+                    try:
+                        joystick_sock.send(orjson.dumps(data))
+                    except ConnectionRefusedError:
+                        # ICMP port unreachable from an earlier datagram: the bridge isn't running, drop this update
+                        pass
+                    send_count += 1
+                    if not (send_count & LOG_SAMPLE_MASK):
+                        print(f"📤 Sent joystick: x={x:.2f}, y={y:.2f} ({send_count} packets)")
+                    logging.debug("Sent joystick: x=%.2f, y=%.2f", x, y)
+
+                    last_key = key
+                    last_send_time = current_time
+            elif key != last_key and current_time - last_notify_time > 1.0:
+                # Provide notification about blocked controls, but only once per second
+                print("⚠️ Joystick input ignored during force feedback")
+                last_notify_time = current_time
+                # We still update last_key to avoid repeated notifications for the same movement
+                last_key = key
+
+            # Print status and latest data every 5 seconds
+            if current_time - last_report_time >= 5:
+                print(f"📊 Status: Received {packet_count} sensor packets")
+                logging.info(f"Received {packet_count} sensor packets")
 
-        # Small delay to prevent CPU hogging
-        time.sleep(0.01)
+                # Print the latest sensor data in a formatted way
+                if latest_sensor_data:
+                    ax, ay, az, gx, gy, gz, distance, timestamp = latest_sensor_data
+                    print("\n🔍 Latest Sensor Data:")
+                    print(f"  Gyroscope (deg/s): X={gx:.2f}, Y={gy:.2f}, Z={gz:.2f}")
+                    print(f"  Accelerometer (m/s²): X={ax:.2f}, Y={ay:.2f}, Z={az:.2f}")
+                    print(f"  Distance: {distance:.1f} cm\n")
 
+                last_report_time = current_time
 
-def feedback_controller_thread():
-    """Thread for processing sensor data and triggering force feedback"""
-    print("🎮 Feedback controller thread started")
-    logging.info("Feedback controller thread started")
+        except Exception as e:
+            print(f"⚠ Error in control loop: {e}")
+            logging.error(f"Error in control loop: {e}")
 
-    GYRO_AXIS_THRESHOLD = 40.0  # degrees/sec
-    DISTANCE_THRESHOLD = 20.0   # cm
-    MIN_TRIGGER_INTERVAL = 3.0  # seconds
+    sel.close()
 
-    last_trigger_time = 0
 
-    while running:
+def start_feedback_daemon():
+    """Launch the force feedback executable once, elevated, and connect to its named pipe"""
+    global feedback_pipe
+
+    exe_path = os.path.abspath(FORCE_FEEDBACK_EXE)
+    result = ctypes.windll.shell32.ShellExecuteW(None, "runas", exe_path, "--daemon", None, 1)
+    if result <= 32:
+        print(f"❌ Failed to start force feedback daemon (ShellExecute error {result})")
+        logging.error(f"Failed to start force feedback daemon (ShellExecute error {result})")
+        return False
+
+    # The pipe only appears once the user has accepted the UAC prompt
+    deadline = time.monotonic() + FEEDBACK_PIPE_CONNECT_TIMEOUT
+    while time.monotonic() < deadline:
         try:
-            try:
-                sensor_data = sensor_data_queue.get(timeout=0.5)
-            except queue.Empty:
-                continue
+            feedback_pipe = open(FEEDBACK_PIPE, "r+b", buffering=0)
+            break
+        except OSError:
+            if shutdown.wait(0.5):
+                return False
+    else:
+        print("❌ Timed out waiting for the force feedback daemon")
+        logging.error("Timed out waiting for the force feedback daemon")
+        return False
 
-            gx = sensor_data.get('gx', 0.0)
-            gy = sensor_data.get('gy', 0.0)
-            distance = sensor_data.get('distance', 100.0)
+    print("✅ Connected to force feedback daemon")
+    logging.info("Connected to force feedback daemon")
+    return True
 
-            current_time = time.time()
 
-            movement_trigger = abs(gx) > GYRO_AXIS_THRESHOLD or abs(gy) > GYRO_AXIS_THRESHOLD
-            obstacle_trigger = distance < DISTANCE_THRESHOLD
-            should_trigger = movement_trigger or obstacle_trigger
+def end_feedback_mode():
+    """Re-enable joystick controls once force feedback has finished"""
+    global feedback_active
+    if feedback_active:
+        feedback_active = False
+        print("🔓 EXITING FEEDBACK MODE - Joystick controls re-enabled")
+
 
-            if should_trigger and (current_time - last_trigger_time > MIN_TRIGGER_INTERVAL):
-                if obstacle_trigger:
-                    feedback_type = 1  # FEEDBACK_OBSTACLE
-                    print(f"\n⚠️ OBSTACLE DETECTED! Distance: {distance:.1f} cm")
-                else:
-                    feedback_type = 2  # FEEDBACK_MOVEMENT
-                    print(f"\n⚠️ MOVEMENT DETECTED! gx={gx:.1f}, gy={gy:.1f}")
+def feedback_pipe_thread():
+    """Thread for sending feedback requests to the daemon and waiting for them to finish"""
+    global feedback_pipe, feedback_pipe_busy
 
-                trigger_force_feedback(feedback_type)
-                last_trigger_time = current_time
+    while not shutdown.is_set():
+        try:
+            feedback_type = feedback_requests.get(timeout=0.5)
+        except queue.Empty:
+            continue
 
+        try:
+            feedback_pipe.write(bytes([feedback_type]))
+            # The daemon answers with one byte once the effect has finished playing
+            if not feedback_pipe.read(1):
+                raise OSError("force feedback daemon closed the pipe")
         except Exception as e:
-            print(f"⚠ Error in feedback controller: {e}")
-            logging.error(f"Error in feedback controller: {e}")
+            print(f"❌ Force feedback daemon error: {e}")
+            logging.error(f"Force feedback daemon error: {e}")
+            feedback_pipe.close()
+            feedback_pipe = None
 
-        time.sleep(0.01)
+        feedback_pipe_busy = False
+        end_feedback_mode()
 
 
 def trigger_force_feedback(feedback_type):
-    """Start the force feedback executable with the specified feedback type"""
-    global feedback_process, feedback_active
+    """Ask the force feedback daemon to play the specified feedback type"""
+    global feedback_process, feedback_active, feedback_deadline, feedback_pipe_busy
 
     if feedback_active:
         print("⚠️ Force feedback already active, ignoring new trigger")
         return False
 
+    if feedback_pipe_busy:
+        print("⚠️ Force feedback daemon still busy with an earlier request, ignoring new trigger")
+        return False
+
     # Set feedback active flag at the start to block joystick input immediately
     feedback_active = True
+    feedback_deadline = time.monotonic() + FEEDBACK_TIMEOUT
     print("🔒 ENTERING FEEDBACK MODE - Joystick controls temporarily disabled")
 
     try:
-        # Windows-specific approach to run with admin privileges
-        if os.name == 'nt':  # Windows
-            # Create a VBS script that elevates privileges (RunAs)
-            exe_path = os.path.abspath(FORCE_FEEDBACK_EXE)
-            params = str(feedback_type)
-
-            vbs_content = f'''
-            Set UAC = CreateObject("Shell.Application")
-            UAC.ShellExecute "{exe_path}", "{params}", "", "runas", 1
-            '''
-
-            # Write temporary VBS script
-            vbs_path = os.path.join(os.environ['TEMP'], "run_elevated.vbs")
-            with open(vbs_path, 'w') as f:
-                f.write(vbs_content)
-
-            # Execute the VBS script
-            print(f"🎮 Triggering force feedback, type: {feedback_type}")
-            logging.info(f"Triggering force feedback, type: {feedback_type}")
-
-            # Use subprocess to start the VBS script (which then starts the exe with elevation)
-            subprocess.Popen(["cscript", "//NoLogo", vbs_path])
-
-            # Set a timer to clean up the temporary script
-            def cleanup_vbs():
-                time.sleep(5)  # Wait to ensure the script has run
-                try:
-                    os.remove(vbs_path)
-                except:
-                    pass
+        print(f"🎮 Triggering force feedback, type: {feedback_type}")
+        logging.info(f"Triggering force feedback, type: {feedback_type}")
 
-            threading.Thread(target=cleanup_vbs, daemon=True).start()
-
-            # Since we can't track the elevated process directly, set a timer to reset feedback_active
-            def reset_feedback_active():
-                time.sleep((OSCILLATION_DURATION / 1000) + 1)  # Convert ms to seconds + 1s buffer
-                global feedback_active
-                feedback_active = False
-                print("🔓 EXITING FEEDBACK MODE - Joystick controls re-enabled")
+        if os.name == 'nt':  # Windows
+            if feedback_pipe is None:
+                raise RuntimeError("force feedback daemon is not connected")
 
-            threading.Thread(target=reset_feedback_active, daemon=True).start()
+            # feedback_pipe_thread clears feedback_active when the daemon reports completion,
+            # the control loop does it at feedback_deadline if the daemon never does
+            feedback_pipe_busy = True
+            feedback_requests.put(feedback_type)
 
         else:
             # For non-Windows systems (fallback, though force feedback likely won't work)
-            print(f"🎮 Triggering force feedback, type: {feedback_type}")
-            logging.info(f"Triggering force feedback, type: {feedback_type}")
-
             feedback_process = subprocess.Popen([FORCE_FEEDBACK_EXE, str(feedback_type)])
 
         return True
@@ -339,6 +405,14 @@ def cleanup():
             print(f"⚠️ Error terminating force feedback: {e}")
             logging.error(f"Error terminating force feedback: {e}")
 
+    # Closing the pipe tells the force feedback daemon to exit
+    global feedback_pipe
+    if feedback_pipe is not None:
+        feedback_pipe.close()
+        feedback_pipe = None
+        print("✅ Force feedback daemon disconnected")
+        logging.info("Force feedback daemon disconnected")
+
     # Close pygame
     pygame.quit()
     print("✅ Pygame closed")
@@ -351,8 +425,7 @@ def cleanup():
 # === SIGNAL HANDLER ===
 def signal_handler(sig, frame):
     """Handle keyboard interrupts"""
-    global running
-    running = False
+    shutdown.set()
     print("\n🛑 Program termination requested")
     logging.info("Program termination requested")
 
@@ -364,8 +437,6 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 def main():
     """Main function"""
-    global running
-
     print("🤖 Bidirectional Robot Control System")
     print("-----------------------------------")
     logging.info("Bidirectional Robot Control System started")
@@ -379,41 +450,28 @@ def main():
         print("❌ Initialization failed. Exiting.")
         return 1
 
-    # Create and start threads
-    threads = []
-
-    joystick_thread = threading.Thread(target=joystick_sender_thread, args=(joystick, joystick_sock))
-    joystick_thread.daemon = True
-    threads.append(joystick_thread)
-
-    sensor_thread = threading.Thread(target=sensor_receiver_thread, args=(sensor_sock,))
-    sensor_thread.daemon = True
-    threads.append(sensor_thread)
-
-    feedback_thread = threading.Thread(target=feedback_controller_thread)
-    feedback_thread.daemon = True
-    threads.append(feedback_thread)
+    # Start the elevated force feedback daemon once, up front
+    if os.name == 'nt' and not start_feedback_daemon():
+        print("⚠️ Continuing without force feedback")
 
-    # Start all threads
-    for thread in threads:
-        thread.start()
+    # The pipe to the force feedback daemon blocks on Windows, so it keeps its own thread
+    feedback_pipe_worker = threading.Thread(target=feedback_pipe_thread)
+    feedback_pipe_worker.daemon = True
+    feedback_pipe_worker.start()
 
     print("\n✅ System initialized and running...")
     print("Press Ctrl+C to exit")
 
-    # Main loop - just keep program alive and check for exit condition
+    # Joystick, sensor and feedback handling all run in this one loop until exit is requested
     try:
-        while running:
-            time.sleep(0.1)
+        control_loop(joystick, joystick_sock, sensor_sock)
     except KeyboardInterrupt:
-        running = False
+        shutdown.set()
         print("\n🛑 Keyboard interrupt received")
         logging.info("Keyboard interrupt received")
 
-    # Wait for threads to terminate (short timeout)
-    print("Waiting for threads to terminate...")
-    for thread in threads:
-        thread.join(timeout=2.0)
+    # Wait for the feedback pipe thread to terminate (short timeout)
+    feedback_pipe_worker.join(timeout=2.0)
 
     # Cleanup
     cleanup()